@@ -23,6 +23,9 @@ import numpy as np
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
+# Used when the number of images is unknown, e.g. for some TFDS datasets.
+_DEFAULT_SHUFFLE_BUFFER_SIZE = 10000
+
 
 def normalize_image(image):
   """Rescale from range [0, 255] to [-1, 1]."""
@@ -69,6 +72,34 @@ def full_image_to_patch(image, patch_size):
   return image_patch
 
 
+def _decode_center_square(image_bytes):
+  """Decodes an encoded image, cropping JPEGs to their center square.
+
+  `_sample_patch` only keeps the center square of each image, so for JPEGs we
+  skip decoding the rest of the image entirely. Other formats are fully
+  decoded.
+
+  Args:
+    image_bytes: A scalar string `Tensor` of encoded image bytes.
+
+  Returns:
+    A 3D uint8 `Tensor` of HWC format.
+  """
+  def _decode_and_crop_jpeg():
+    image_shape = tf.io.extract_jpeg_shape(image_bytes)
+    height, width = image_shape[0], image_shape[1]
+    target_size = tf.minimum(height, width)
+    crop_window = tf.stack([(height - target_size) // 2,
+                            (width - target_size) // 2,
+                            target_size, target_size])
+    return tf.io.decode_and_crop_jpeg(image_bytes, crop_window)
+
+  return tf.cond(
+      pred=tf.io.is_jpeg(image_bytes),
+      true_fn=_decode_and_crop_jpeg,
+      false_fn=lambda: tf.image.decode_image(image_bytes))
+
+
 def _provide_custom_dataset(image_file_pattern, num_threads=1):
   """Provides batches of custom image data.
 
@@ -82,7 +113,7 @@ def _provide_custom_dataset(image_file_pattern, num_threads=1):
   filenames_ds = tf.data.Dataset.list_files(image_file_pattern)
   bytes_ds = filenames_ds.map(tf.io.read_file, num_parallel_calls=num_threads)
   images_ds = bytes_ds.map(
-      tf.image.decode_image, num_parallel_calls=num_threads)
+      _decode_center_square, num_parallel_calls=num_threads)
   return images_ds
 
 
@@ -104,13 +135,27 @@ def _preprocess_datasets(dataset, batch_size, shuffle=True, num_threads=1,
   patches_ds = dataset.map(
       lambda img: full_image_to_patch(img, patch_size),
       num_parallel_calls=num_threads)
-  patches_ds = patches_ds.repeat()
+  patches_ds = patches_ds.cache()
 
   if shuffle:
-    patches_ds = patches_ds.shuffle(5 * batch_size)
+    # The cache replays the first epoch's file order, so reshuffle all of the
+    # cached patches every epoch.
+    num_patches = tf.data.experimental.cardinality(patches_ds)
+    buffer_size = tf.where(num_patches > 0, num_patches,
+                           tf.constant(_DEFAULT_SHUFFLE_BUFFER_SIZE, tf.int64))
+    patches_ds = patches_ds.shuffle(buffer_size, reshuffle_each_iteration=True)
+
+  patches_ds = patches_ds.repeat()
+
+  patches_ds = patches_ds.batch(batch_size, drop_remainder=True)
+  patches_ds = patches_ds.prefetch(tf.data.experimental.AUTOTUNE)
 
-  patches_ds = patches_ds.prefetch(5 * batch_size)
-  patches_ds = patches_ds.batch(batch_size)
+  # The cache, shuffle and repeat between the map and the batch prevent
+  # map_and_batch_fusion, so parallelize copying elements into each batch
+  # instead.
+  options = tf.data.Options()
+  options.experimental_optimization.parallel_batch = True
+  patches_ds = patches_ds.with_options(options)
 
   return patches_ds
 
@@ -59,6 +59,23 @@ class DataProviderTest(tf.test.TestCase):
       self.assertTupleEqual((10, 10, 3), sess.run(patch2).shape)
       self.assertTupleEqual((10, 10, 3), sess.run(patch3).shape)
 
+  def test_decode_center_square(self):
+    # Odd height/width differences exercise the center-crop offsets in both
+    # directions.
+    for height, width in [(37, 64), (64, 37)]:
+      image_np = np.random.RandomState(0).randint(
+          0, 256, size=(height, width, 3)).astype(np.uint8)
+      image_bytes = tf.io.encode_jpeg(image_np)
+      image = data_provider._decode_center_square(image_bytes)
+      target_size = min(height, width)
+      expected_image = tf.image.resize_with_crop_or_pad(
+          tf.io.decode_jpeg(image_bytes), target_size, target_size)
+      with self.cached_session() as sess:
+        image_out, expected_image_out = sess.run([image, expected_image])
+      self.assertTupleEqual((target_size, target_size, 3), image_out.shape)
+      # Partial decoding must give exactly the pixels of a full decode + crop.
+      self.assertAllEqual(expected_image_out, image_out)
+
   def test_custom_dataset_provider(self):
     if tf.executing_eagerly():
       # dataset.make_initializable_iterator is not supported when eager
@@ -88,7 +105,7 @@ class DataProviderTest(tf.test.TestCase):
         image_file_patterns=[file_pattern, file_pattern],
         patch_size=patch_size)
     for images_ds in images_ds_list:
-      self.assertListEqual([None, patch_size, patch_size, 3],
+      self.assertListEqual([batch_size, patch_size, patch_size, 3],
                            images_ds.output_shapes.as_list())
       self.assertEqual(tf.float32, images_ds.output_types)
 
@@ -78,7 +78,10 @@ class InferenceDemoTest(tf.test.TestCase):
         max_number_of_steps=1,
         ps_replicas=0,
         task=0,
-        cycle_consistency_loss_weight=2.0)
+        cycle_consistency_loss_weight=2.0,
+        use_xla=False,
+        mixed_precision=False,
+        summary_steps=500)
     mock_provide_custom_data.return_value = (
         tf.zeros([3, 4, 4, 3,]), tf.zeros([3, 4, 4, 3]))
     train_lib.train(hparams)
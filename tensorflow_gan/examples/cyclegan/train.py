@@ -21,6 +21,7 @@ from __future__ import print_function
 
 from absl import app
 from absl import flags
+import tensorflow as tf
 
 from tensorflow_gan.examples.cyclegan import train_lib
 
@@ -49,16 +50,32 @@ flags.DEFINE_integer(
     'identify each worker.')
 flags.DEFINE_float('cycle_consistency_loss_weight', 10.0,
                    'The weight of cycle consistency loss')
+flags.DEFINE_bool(
+    'use_xla', True,
+    'Whether to JIT compile the training graph with XLA. XLA fuses the many '
+    'small elementwise ops in the losses and optimizer updates, but can be '
+    'slower on some graphs.')
+flags.DEFINE_bool(
+    'mixed_precision', True,
+    'Whether to train with automatic mixed precision. Convolutions run in '
+    'float16 on GPU while variables stay in float32, with dynamic loss '
+    'scaling.')
+flags.DEFINE_integer('summary_steps', 500,
+                     'The frequency, in steps, at which summaries are saved.')
 
 FLAGS = flags.FLAGS
 
 
 def main(_):
+  # Resource variables let the Adam updates use the fused ResourceApplyAdam
+  # kernel, which XLA can cluster with the rest of the step.
+  tf.compat.v1.enable_resource_variables()
   hparams = train_lib.HParams(
       FLAGS.image_set_x_file_pattern, FLAGS.image_set_y_file_pattern,
       FLAGS.batch_size, FLAGS.patch_size, FLAGS.master, FLAGS.train_log_dir,
       FLAGS.generator_lr, FLAGS.discriminator_lr, FLAGS.max_number_of_steps,
-      FLAGS.ps_replicas, FLAGS.task, FLAGS.cycle_consistency_loss_weight)
+      FLAGS.ps_replicas, FLAGS.task, FLAGS.cycle_consistency_loss_weight,
+      FLAGS.use_xla, FLAGS.mixed_precision, FLAGS.summary_steps)
   train_lib.train(hparams)
 
 
@@ -40,6 +40,9 @@ HParams = collections.namedtuple('HParams', [
     'ps_replicas',
     'task',
     'cycle_consistency_loss_weight',
+    'use_xla',
+    'mixed_precision',
+    'summary_steps',
 ])
 
 
@@ -55,6 +58,7 @@ def _get_data(image_set_x_file_pattern, image_set_y_file_pattern, batch_size,
   images_x, images_y = data_provider.provide_custom_data(
       batch_size=batch_size,
       image_file_patterns=image_file_patterns,
+      num_threads=tf.data.experimental.AUTOTUNE,
       patch_size=patch_size)
 
   return images_x, images_y
@@ -82,36 +86,30 @@ def _define_model(images_x, images_y):
   return cyclegan_model
 
 
-def _get_lr(base_lr, max_number_of_steps):
+def _get_lr(base_lr, max_number_of_steps, global_step):
   """Returns a learning rate `Tensor`.
 
   Args:
     base_lr: A scalar float `Tensor` or a Python number.  The base learning
       rate.
     max_number_of_steps: The maximum number of steps to train.
+    global_step: A scalar integer `Tensor`.  The global training step.
 
   Returns:
     A scalar float `Tensor` of learning rate which equals `base_lr` when the
     global training step is less than max_number_of_steps / 2,
     afterwards it linearly decays to zero.
   """
-  global_step = tf.compat.v1.train.get_or_create_global_step()
-  lr_constant_steps = max_number_of_steps // 2
+  lr_decay_steps = max_number_of_steps - max_number_of_steps // 2
+  # The fraction of the decay period left, clipped to [0, 1]. It is above 1
+  # during the constant first half, so the clip covers both phases without a
+  # `tf.cond` or `polynomial_decay`'s per-step `pow`.
+  remaining = (max_number_of_steps -
+               tf.cast(global_step, tf.float32)) / lr_decay_steps
+  return base_lr * tf.clip_by_value(remaining, 0.0, 1.0)
 
-  def _lr_decay():
-    return tf.compat.v1.train.polynomial_decay(
-        learning_rate=base_lr,
-        global_step=(global_step - lr_constant_steps),
-        decay_steps=(max_number_of_steps - lr_constant_steps),
-        end_learning_rate=0.0)
 
-  return tf.cond(
-      pred=global_step < lr_constant_steps,
-      true_fn=lambda: base_lr,
-      false_fn=_lr_decay)
-
-
-def _get_optimizer(gen_lr, dis_lr):
+def _get_optimizer(gen_lr, dis_lr, mixed_precision=False):
   """Returns generator optimizer and discriminator optimizer.
 
   Args:
@@ -119,6 +117,8 @@ def _get_optimizer(gen_lr, dis_lr):
       rate.
     dis_lr: A scalar float `Tensor` or a Python number.  The Discriminator
       learning rate.
+    mixed_precision: Whether to wrap the optimizers for automatic mixed
+      precision with dynamic loss scaling.
 
   Returns:
     A tuple of generator optimizer and discriminator optimizer.
@@ -129,10 +129,15 @@ def _get_optimizer(gen_lr, dis_lr):
       gen_lr, beta1=0.5, use_locking=True)
   dis_opt = tf.compat.v1.train.AdamOptimizer(
       dis_lr, beta1=0.5, use_locking=True)
+  if mixed_precision:
+    enable_amp = (
+        tf.compat.v1.train.experimental.enable_mixed_precision_graph_rewrite)
+    gen_opt = enable_amp(gen_opt, loss_scale='dynamic')
+    dis_opt = enable_amp(dis_opt, loss_scale='dynamic')
   return gen_opt, dis_opt
 
 
-def _define_train_ops(cyclegan_model, cyclegan_loss, hparams):
+def _define_train_ops(cyclegan_model, cyclegan_loss, hparams, global_step):
   """Defines train ops that trains `cyclegan_model` with `cyclegan_loss`.
 
   Args:
@@ -140,34 +145,55 @@ def _define_train_ops(cyclegan_model, cyclegan_loss, hparams):
     cyclegan_loss: A `CycleGANLoss` namedtuple containing all losses for
       `cyclegan_model`.
     hparams: An HParams instance containing the hyperparameters for training.
+    global_step: A scalar integer `Tensor`.  The global training step.
 
   Returns:
     A `GANTrainOps` namedtuple.
   """
-  gen_lr = _get_lr(hparams.generator_lr, hparams.max_number_of_steps)
-  dis_lr = _get_lr(hparams.discriminator_lr, hparams.max_number_of_steps)
-  gen_opt, dis_opt = _get_optimizer(gen_lr, dis_lr)
+  gen_lr = _get_lr(hparams.generator_lr, hparams.max_number_of_steps,
+                   global_step)
+  dis_lr = _get_lr(hparams.discriminator_lr, hparams.max_number_of_steps,
+                   global_step)
+  gen_opt, dis_opt = _get_optimizer(gen_lr, dis_lr, hparams.mixed_precision)
   train_ops = tfgan.gan_train_ops(
       cyclegan_model,
       cyclegan_loss,
       generator_optimizer=gen_opt,
       discriminator_optimizer=dis_opt,
-      summarize_gradients=True,
+      summarize_gradients=False,
       colocate_gradients_with_ops=True,
-      aggregation_method=tf.AggregationMethod.EXPERIMENTAL_ACCUMULATE_N)
+      aggregation_method=tf.AggregationMethod.EXPERIMENTAL_TREE)
 
   tf.compat.v1.summary.scalar('generator_lr', gen_lr)
   tf.compat.v1.summary.scalar('discriminator_lr', dis_lr)
   return train_ops
 
 
+def _get_session_config(use_xla):
+  """Returns a `tf.compat.v1.ConfigProto` for the training session.
+
+  Args:
+    use_xla: Whether to turn on XLA JIT compilation for the whole graph.
+
+  Returns:
+    A `tf.compat.v1.ConfigProto` instance.
+  """
+  config = tf.compat.v1.ConfigProto()
+  if use_xla:
+    config.graph_options.optimizer_options.global_jit_level = (
+        tf.compat.v1.OptimizerOptions.ON_1)
+  return config
+
+
 def train(hparams):
   """Trains a CycleGAN.
 
   Args:
     hparams: An HParams instance containing the hyperparameters for training.
   """
-  if not tf.io.gfile.exists(hparams.train_log_dir):
+  # Only the chief writes checkpoints and summaries, so only it needs the log
+  # directory.
+  if hparams.task == 0 and not tf.io.gfile.exists(hparams.train_log_dir):
     tf.io.gfile.makedirs(hparams.train_log_dir)
 
   with tf.device(tf.compat.v1.train.replica_device_setter(hparams.ps_replicas)):
@@ -186,13 +212,15 @@ def train(hparams):
         tensor_pool_fn=tfgan.features.tensor_pool)
 
     # Define CycleGAN train ops.
-    train_ops = _define_train_ops(cyclegan_model, cyclegan_loss, hparams)
+    global_step = tf.compat.v1.train.get_or_create_global_step()
+    train_ops = _define_train_ops(cyclegan_model, cyclegan_loss, hparams,
+                                  global_step)
 
     # Training
     train_steps = tfgan.GANTrainSteps(1, 1)
     status_message = tf.strings.join([
         'Starting train step: ',
-        tf.as_string(tf.compat.v1.train.get_or_create_global_step())
+        tf.as_string(global_step)
     ],
                                      name='status_message')
     if not hparams.max_number_of_steps:
@@ -207,4 +235,6 @@ def train(hparams):
                                            every_n_iter=10)
         ],
         master=hparams.master,
-        is_chief=hparams.task == 0)
+        is_chief=hparams.task == 0,
+        save_summaries_steps=hparams.summary_steps,
+        config=_get_session_config(hparams.use_xla))
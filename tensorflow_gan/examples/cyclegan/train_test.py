@@ -59,7 +59,10 @@ class TrainTest(tf.test.TestCase):
         max_number_of_steps=500000,
         ps_replicas=0,
         task=0,
-        cycle_consistency_loss_weight=10.0)
+        cycle_consistency_loss_weight=10.0,
+        use_xla=False,
+        mixed_precision=False,
+        summary_steps=500)
 
   def tearDown(self):
     super(TrainTest, self).tearDown()
@@ -85,23 +88,41 @@ class TrainTest(tf.test.TestCase):
 
   @mock.patch.object(train_lib.networks, 'generator', autospec=True)
   @mock.patch.object(train_lib.networks, 'discriminator', autospec=True)
-  @mock.patch.object(
-      tf.compat.v1.train, 'get_or_create_global_step', autospec=True)
-  def test_get_lr(self, mock_get_or_create_global_step,
-                  unused_mock_discriminator, unused_mock_generator):
+  def test_get_lr(self, unused_mock_discriminator, unused_mock_generator):
     if tf.executing_eagerly():
       return
     base_lr = 0.01
     max_number_of_steps = 10
     with self.cached_session(use_gpu=True) as sess:
-      mock_get_or_create_global_step.return_value = tf.constant(2)
-      lr_step2 = sess.run(train_lib._get_lr(base_lr, max_number_of_steps))
-      mock_get_or_create_global_step.return_value = tf.constant(9)
-      lr_step9 = sess.run(train_lib._get_lr(base_lr, max_number_of_steps))
+      lr_step2 = sess.run(
+          train_lib._get_lr(base_lr, max_number_of_steps, tf.constant(2)))
+      lr_step9 = sess.run(
+          train_lib._get_lr(base_lr, max_number_of_steps, tf.constant(9)))
 
     self.assertAlmostEqual(base_lr, lr_step2)
     self.assertAlmostEqual(base_lr * 0.2, lr_step9)
 
+  def test_get_lr_boundaries(self):
+    if tf.executing_eagerly():
+      return
+    base_lr = 0.01
+    # (max_number_of_steps, global_step, expected learning rate multiplier).
+    test_cases = [
+        (10, 5, 1.0),  # First decay step.
+        (10, 10, 0.0),  # Last step.
+        (10, 12, 0.0),  # Past the last step.
+        (11, 4, 1.0),  # Odd number of steps: constant until step 5.
+        (11, 5, 1.0),
+        (11, 8, 0.5),
+        (11, 11, 0.0),
+        (11, 20, 0.0),
+    ]
+    with self.cached_session(use_gpu=True) as sess:
+      for max_number_of_steps, step, multiplier in test_cases:
+        lr = sess.run(
+            train_lib._get_lr(base_lr, max_number_of_steps, tf.constant(step)))
+        self.assertAlmostEqual(base_lr * multiplier, lr)
+
   @mock.patch.object(tf.compat.v1.train, 'AdamOptimizer', autospec=True)
   def test_get_optimizer(self, mock_adam_optimizer):
     gen_lr, dis_lr = 0.1, 0.01
@@ -111,6 +132,30 @@ class TrainTest(tf.test.TestCase):
         mock.call(dis_lr, beta1=mock.ANY, use_locking=True)
     ])
 
+  def test_get_session_config(self):
+    config = train_lib._get_session_config(use_xla=True)
+    self.assertEqual(tf.compat.v1.OptimizerOptions.ON_1,
+                     config.graph_options.optimizer_options.global_jit_level)
+    config = train_lib._get_session_config(use_xla=False)
+    self.assertEqual(tf.compat.v1.OptimizerOptions.DEFAULT,
+                     config.graph_options.optimizer_options.global_jit_level)
+
+  @mock.patch.object(
+      tf.compat.v1.train.experimental,
+      'enable_mixed_precision_graph_rewrite',
+      autospec=True)
+  @mock.patch.object(tf.compat.v1.train, 'AdamOptimizer', autospec=True)
+  def test_get_optimizer_mixed_precision(self, mock_adam_optimizer,
+                                         mock_enable_amp):
+    gen_opt, dis_opt = train_lib._get_optimizer(
+        gen_lr=0.1, dis_lr=0.01, mixed_precision=True)
+    mock_enable_amp.assert_has_calls([
+        mock.call(mock_adam_optimizer.return_value, loss_scale='dynamic'),
+        mock.call(mock_adam_optimizer.return_value, loss_scale='dynamic')
+    ])
+    self.assertEqual(mock_enable_amp.return_value, gen_opt)
+    self.assertEqual(mock_enable_amp.return_value, dis_opt)
+
   def test_define_train_ops(self):
     if tf.executing_eagerly():
       # `tfgan.cyclegan_model` doesn't work when executing eagerly.
@@ -126,8 +171,33 @@ class TrainTest(tf.test.TestCase):
     cyclegan_loss = tfgan.cyclegan_loss(
         cyclegan_model, cycle_consistency_loss_weight=10.0)
 
-    train_ops = train_lib._define_train_ops(cyclegan_model, cyclegan_loss,
-                                            self.hparams)
+    train_ops = train_lib._define_train_ops(
+        cyclegan_model, cyclegan_loss, self.hparams,
+        tf.compat.v1.train.get_or_create_global_step())
+    self.assertIsInstance(train_ops, tfgan.GANTrainOps)
+
+  def test_define_train_ops_mixed_precision(self):
+    if tf.executing_eagerly():
+      # `tfgan.cyclegan_model` doesn't work when executing eagerly.
+      return
+    # The graph rewrite is process-wide, so don't leak it into other tests.
+    self.addCleanup(
+        tf.compat.v1.train.experimental.disable_mixed_precision_graph_rewrite)
+    self.hparams = self.hparams._replace(
+        batch_size=2, generator_lr=0.1, discriminator_lr=0.01,
+        mixed_precision=True)
+
+    images_shape = [self.hparams.batch_size, 4, 4, 3]
+    images_x = tf.zeros(images_shape, dtype=tf.float32)
+    images_y = tf.zeros(images_shape, dtype=tf.float32)
+
+    cyclegan_model = train_lib._define_model(images_x, images_y)
+    cyclegan_loss = tfgan.cyclegan_loss(
+        cyclegan_model, cycle_consistency_loss_weight=10.0)
+
+    train_ops = train_lib._define_train_ops(
+        cyclegan_model, cyclegan_loss, self.hparams,
+        tf.compat.v1.train.get_or_create_global_step())
     self.assertIsInstance(train_ops, tfgan.GANTrainOps)
 
   @mock.patch.object(tf.io, 'gfile', autospec=True)
@@ -155,10 +225,13 @@ class TrainTest(tf.test.TestCase):
         [3, 2, 2, 3], dtype=tf.float32), tf.zeros([3, 2, 2, 3],
                                                   dtype=tf.float32))
 
+    mock_gfile.exists.return_value = False
+
     train_lib.train(self.hparams)
     mock_data_provider.provide_custom_data.assert_called_once_with(
         batch_size=3, image_file_patterns=['/tmp/x/*.jpg', '/tmp/y/*.jpg'],
-        patch_size=8)
+        num_threads=tf.data.experimental.AUTOTUNE, patch_size=8)
+    mock_gfile.makedirs.assert_called_once_with('/tmp/foo')
     mock_define_model.assert_called_once_with(mock.ANY, mock.ANY)
     mock_cyclegan_loss.assert_called_once_with(
         mock_define_model.return_value,
@@ -166,14 +239,38 @@ class TrainTest(tf.test.TestCase):
         tensor_pool_fn=mock.ANY)
     mock_define_train_ops.assert_called_once_with(
         mock_define_model.return_value, mock_cyclegan_loss.return_value,
-        self.hparams)
+        self.hparams, mock.ANY)
     mock_gan_train.assert_called_once_with(
         mock_define_train_ops.return_value,
         '/tmp/foo',
         get_hooks_fn=mock.ANY,
         hooks=mock.ANY,
         master='master',
-        is_chief=True)
+        is_chief=True,
+        save_summaries_steps=500,
+        config=mock.ANY)
+
+  @mock.patch.object(tf.io, 'gfile', autospec=True)
+  @mock.patch.object(train_lib, 'data_provider', autospec=True)
+  @mock.patch.object(train_lib, '_define_model', autospec=True)
+  @mock.patch.object(tfgan, 'cyclegan_loss', autospec=True)
+  @mock.patch.object(train_lib, '_define_train_ops', autospec=True)
+  @mock.patch.object(tfgan, 'gan_train', autospec=True)
+  def test_main_worker(self, mock_gan_train, unused_mock_define_train_ops,
+                       unused_mock_cyclegan_loss, unused_mock_define_model,
+                       mock_data_provider, mock_gfile):
+    self.hparams = self.hparams._replace(
+        train_log_dir='/tmp/foo', task=1, max_number_of_steps=1)
+    mock_data_provider.provide_custom_data.return_value = (tf.zeros(
+        [1, 2, 2, 3], dtype=tf.float32), tf.zeros([1, 2, 2, 3],
+                                                  dtype=tf.float32))
+    mock_gfile.exists.return_value = False
+
+    train_lib.train(self.hparams)
+    # Only the chief creates the log directory.
+    mock_gfile.exists.assert_not_called()
+    mock_gfile.makedirs.assert_not_called()
+    self.assertFalse(mock_gan_train.call_args[1]['is_chief'])
 
 
 if __name__ == '__main__':